@@ -4,22 +4,44 @@
 Corporate Vulnerability Analysis Engine with AI Agents
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
 import os
+import sys
+
+# Must run before anything imports socket/ssl/threading (set by the gevent deployment)
+if os.getenv('GEVENT'):
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from dotenv import load_dotenv
-import json
+from flask.json.provider import JSONProvider
+import orjson
+import re
 import time
 import random
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
+from collections import namedtuple
+import dataclasses
+import decimal
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache, partial
 from urllib.parse import urlparse
-import tempfile
 import zipfile
-from reportlab.pdfgen import canvas
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from xml.sax.saxutils import escape as xml_escape
 import io
 import logging
+import hashlib
+import html
+from cachetools import TTLCache
+from markupsafe import escape
 
 # Import security utilities
 from security_utils import validate_url_input, validate_api_key, sanitize_filename, rate_limit_key
@@ -40,9 +62,34 @@ from monitoring import (
 # Load environment variables from .env file
 load_dotenv()
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify skips the stdlib encoder"""
+    option = orjson.OPT_NON_STR_KEYS
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        if hasattr(obj, '__html__'):
+            return str(obj.__html__())
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self._default, option=self.option), mimetype='application/json'
+        )
+
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(32).hex())
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(32).hex()
+app.json = OrjsonProvider(app)
 
 # Configure structured logging with rotation
 logger = setup_logging(app)
@@ -53,12 +100,15 @@ setup_sentry()
 setup_prometheus(app)
 
 # Configure rate limiting
+# In-memory counters are per process; point LIMITER_STORAGE_URI at Redis
+# (e.g. redis://redis:6379/0) so limits hold across gunicorn workers
 limiter = Limiter(
     app=app,
     key_func=rate_limit_key,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
-    strategy="fixed-window"
+    storage_uri=os.getenv('LIMITER_STORAGE_URI', 'memory://'),
+    strategy="fixed-window",  # One atomic increment per check on Redis
+    key_prefix="bds"  # Short keys keep Redis round-trips small
 )
 
 # Configure security headers
@@ -94,40 +144,280 @@ else:
     )
     logger.info("⚠️  Security headers relaxed (development mode)")
 
-# Global state for agent simulation
-agent_states = {
-    'ceo': {'progress': 0, 'status': 'Standby', 'active': False},
-    'research': {'progress': 0, 'status': 'Standby', 'active': False},
-    'performance': {'progress': 0, 'status': 'Standby', 'active': False},
-    'image': {'progress': 0, 'status': 'Standby', 'active': False}
+# Completed analyses expire and are capped so a long-running server does not grow forever
+ANALYSIS_RESULTS_MAX = 1000
+ANALYSIS_RESULTS_TTL = 3600  # seconds
+analysis_results = TTLCache(maxsize=ANALYSIS_RESULTS_MAX, ttl=ANALYSIS_RESULTS_TTL)
+analysis_results_lock = threading.Lock()  # TTLCache expires entries on access, so reads mutate too
+
+# Agent progress is tracked per analysis so concurrent users never share state
+AGENT_NAMES = ('ceo', 'research', 'performance', 'image')
+
+@dataclasses.dataclass(frozen=True)
+class AgentState:
+    """Progress of one agent; immutable so snapshots can be shared without copying"""
+    __slots__ = ('progress', 'status', 'active')
+    progress: int
+    status: str
+    active: bool
+
+AGENT_STANDBY = AgentState(progress=0, status='Standby', active=False)
+AGENT_STARTING = AgentState(progress=0, status='Initializing...', active=True)
+
+# Snapshots are never mutated: every update publishes a new dict, so readers can use one
+# without copying, and its serialized form is cached until the next update
+agent_states = TTLCache(maxsize=ANALYSIS_RESULTS_MAX, ttl=ANALYSIS_RESULTS_TTL)
+agent_state_json = TTLCache(maxsize=ANALYSIS_RESULTS_MAX, ttl=ANALYSIS_RESULTS_TTL)
+
+# Guards agent_states and is signalled on every update so streaming clients get pushed
+agent_state_changed = threading.Condition(threading.RLock())
+AGENT_STREAM_KEEPALIVE = 15  # seconds between SSE keepalive comments while nothing changes
+
+# Per-depth analysis parameters, resolved once per request
+AnalysisParams = namedtuple('AnalysisParams', ['num_vulnerabilities', 'num_angles', 'estimated_duration'])
+ANALYSIS_PARAMS = {
+    'quick': AnalysisParams(num_vulnerabilities=3, num_angles=3, estimated_duration=30),
+    'deep': AnalysisParams(num_vulnerabilities=5, num_angles=5, estimated_duration=180),
+    'mega': AnalysisParams(num_vulnerabilities=8, num_angles=8, estimated_duration=600),
 }
+DEFAULT_ANALYSIS_TYPE = 'deep'
+
+# Upper bound on AI response size we are willing to parse (scraped titles feed the prompt)
+MAX_AI_RESPONSE_CHARS = 256_000
+
+# Parsed OpenAI analyses are reused for repeat (url, type, title) requests
+ANALYSIS_CACHE_SIZE = 512
+ANALYSIS_CACHE_TTL = 3600  # seconds
+IMAGE_CACHE_SIZE = 512
+IMAGE_CACHE_TTL = 1800  # seconds
+MAX_IMAGE_COUNT = 10  # Keeps the batched concept request (200 tokens per image) within gpt-4o's output limit
+
+# Shared HTTP session for scraping - pools keep-alive TCP/TLS connections across analyses
+http_session = requests.Session()
+http_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+})
+http_adapter = HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.3)  # Retry transient connection failures
+)
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
+
+# Scraping only needs the <title>, so stop reading the body once it has been seen
+SCRAPE_TIMEOUT = (3, 10)  # (connect, read) seconds - fail fast on unreachable hosts
+SCRAPE_CHUNK_SIZE = 8192
+SCRAPE_MAX_BYTES = 64 * 1024
+SCRAPE_TITLE_OVERLAP = 1024  # Re-scan this much of the previous chunk for a title split across chunks
+SCRAPE_DRAIN_MAX_BYTES = 64 * 1024  # Finish reading bodies this close to done so the connection is pooled
+_TITLE_RE = re.compile(rb'<title[^>]*>(.{0,512}?)</title>', re.IGNORECASE | re.DOTALL)
+_HOST_RE = re.compile(r'^(?:https?://)?([^/]+)')
+
+# Static PENTAGRAM framework text; only the slots are filled per prompt
+_PENTAGRAM_TEMPLATE = """
+P - PURPOSE: Create satirical visual commentary exposing "{primary_vulnerability}" in {brand_name}'s brand strategy
+E - ELEMENTS: Corporate imagery, visual metaphors, symbolic contradictions, brand iconography subversion
+N - NARRATIVE: "{primary_angle}" - revealing the gap between corporate messaging and reality
+T - TONE: Witty, clever, incisive yet professional - satirical without being offensive or crude
+A - AUDIENCE: Media-literate consumers who understand corporate marketing tactics and visual symbolism
+G - GUIDELINES: Professional quality, suitable for editorial use, legally defensible parody/commentary
+R - RESULTS: Single powerful image concept that immediately communicates the satirical point
+A - AESTHETICS: Contemporary editorial illustration style, clean composition, symbolic clarity
+M - METAPHORS: Visual symbols that represent {primary_vulnerability} through recognizable corporate imagery
+
+TARGET VULNERABILITIES: {vulns}
+SATIRICAL PERSPECTIVES: {angles}
+BRAND CONTEXT: {brand_name}
+IMAGE SEQUENCE: #{image_number} of conceptual series"""
+
+# Structured output schemas - the model must return exactly these shapes
+_ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "brand_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "vulnerabilities": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "score": {"type": "number"},
+                            "description": {"type": "string"}
+                        },
+                        "required": ["name", "score", "description"],
+                        "additionalProperties": False
+                    }
+                },
+                "satirical_angles": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["vulnerabilities", "satirical_angles"],
+            "additionalProperties": False
+        }
+    }
+}
+_CONCEPTS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "image_concepts",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "concepts": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"concept": {"type": "string"}},
+                        "required": ["concept"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["concepts"],
+            "additionalProperties": False
+        }
+    }
+}
+
+def standby_agent_states():
+    """Fresh agent states for an analysis that has not started"""
+    return dict.fromkeys(AGENT_NAMES, AGENT_STANDBY)
+
+STANDBY_AGENT_JSON = orjson.dumps(standby_agent_states())
+
+def start_agent_states(analysis_id):
+    """Register agent states for a new analysis"""
+    with agent_state_changed:
+        agent_states[analysis_id] = dict.fromkeys(AGENT_NAMES, AGENT_STARTING)
+        agent_state_json.pop(analysis_id, None)
+        agent_state_changed.notify_all()
+
+@lru_cache(maxsize=1024)
+def brand_name_from_url(url):
+    """Host part of a URL, used as the brand name in prompts and concepts"""
+    match = _HOST_RE.match(url)
+    return match.group(1) if match else url
+
+def parse_content_length(value):
+    """Content-Length header as an int, or None if missing or malformed"""
+    try:
+        length = int(value)
+    except (TypeError, ValueError):
+        return None
+    return length if length >= 0 else None
+
+def get_analysis_result(analysis_id):
+    """Stored analysis result, or None if unknown or expired"""
+    with analysis_results_lock:
+        return analysis_results.get(analysis_id)
+
+def store_analysis_result(analysis_id, result):
+    """Store (or replace) an analysis result; stored results are never mutated in place"""
+    with analysis_results_lock:
+        analysis_results[analysis_id] = result
+
+def update_agent_state(analysis_id, agent=None, **fields):
+    """Update one agent (or all agents when agent is None) of an analysis and wake streaming clients"""
+    with agent_state_changed:
+        states = agent_states.get(analysis_id)
+        if states is None:
+            return  # Analysis expired or was never started
+        agent_states[analysis_id] = {
+            name: dataclasses.replace(state, **fields) if agent is None or name == agent else state
+            for name, state in states.items()
+        }
+        agent_state_json.pop(analysis_id, None)
+        agent_state_changed.notify_all()
+
+def get_agent_snapshot(analysis_id):
+    """Current agent states snapshot of an analysis (None if unknown); must not be mutated"""
+    with agent_state_changed:
+        return agent_states.get(analysis_id)
+
+def get_agent_status_json(analysis_id):
+    """Serialized agent states of an analysis (None if unknown), re-serialized only after an update"""
+    with agent_state_changed:
+        states = agent_states.get(analysis_id)
+        if states is None:
+            return None
+        payload = agent_state_json.get(analysis_id)
+        if payload is None:
+            payload = agent_state_json[analysis_id] = orjson.dumps(states)
+        return payload
 
-analysis_results = {}
-current_analysis_id = None
+# Fallback analysis templates, flattened once so the fallback path only samples
+_VULN_TEMPLATES = (
+    {
+        'categories': ('Premium Pricing', 'Artificial Scarcity', 'Feature Removal'),
+        'satirical_angles': (
+            'The "courage" to charge more for less',
+            'Revolutionary simplicity through elimination',
+            'Premium minimalism at maximum cost'
+        )
+    },
+    {
+        'categories': ('Innovation Theater', 'Marketing Buzzwords', 'Trend Hijacking'),
+        'satirical_angles': (
+            'Disrupting disruption with disruptive innovation',
+            'AI-powered everything (including toasters)',
+            'Sustainable unsustainability initiatives'
+        )
+    },
+    {
+        'categories': ('Customer Lock-in', 'Ecosystem Dependency', 'Planned Obsolescence'),
+        'satirical_angles': (
+            'Freedom through proprietary standards',
+            'Infinite compatibility with finite products',
+            'Future-proofing through forced upgrades'
+        )
+    }
+)
+_ALL_CATEGORIES = tuple(category for template in _VULN_TEMPLATES for category in template['categories'])
+_ALL_ANGLES = tuple(angle for template in _VULN_TEMPLATES for angle in template['satirical_angles'])
+
+# API keys are read and validated once per process rather than per engine instance
+_API_KEY_ENV_VARS = (
+    ('OpenAI', 'OPENAI_API_KEY'),
+    ('Anthropic', 'ANTHROPIC_API_KEY'),
+    ('Google', 'GOOGLE_API_KEY'),
+    ('HuggingFace', 'HUGGINGFACE_API_TOKEN'),
+    ('ElevenLabs', 'ELEVENLABS_API_KEY'),
+)
+_API_KEYS = {name: validate_api_key(os.getenv(env_var), name) for name, env_var in _API_KEY_ENV_VARS}
 
 class BrandAnalysisEngine:
     """AI-powered brand analysis engine with multi-agent coordination"""
     
     def __init__(self):
         # Prioritize OpenAI API - only requirement
-        # Use validate_api_key to check for placeholder values
-        self.openai_api_key = validate_api_key(os.getenv('OPENAI_API_KEY'), 'OpenAI')
-        self.anthropic_api_key = validate_api_key(os.getenv('ANTHROPIC_API_KEY'), 'Anthropic')
-        self.google_api_key = validate_api_key(os.getenv('GOOGLE_API_KEY'), 'Google')
-        self.huggingface_token = validate_api_key(os.getenv('HUGGINGFACE_API_TOKEN'), 'HuggingFace')
-        self.elevenlabs_api_key = validate_api_key(os.getenv('ELEVENLABS_API_KEY'), 'ElevenLabs')
+        # Keys are validated once at import (see _API_KEYS)
+        self.openai_api_key = _API_KEYS['OpenAI']
+        self.anthropic_api_key = _API_KEYS['Anthropic']
+        self.google_api_key = _API_KEYS['Google']
+        self.huggingface_token = _API_KEYS['HuggingFace']
+        self.elevenlabs_api_key = _API_KEYS['ElevenLabs']
         
         # OpenAI is the primary requirement
         if not self.openai_api_key:
-            print("⚠️  Warning: OpenAI API key not found. Using enhanced mock mode.")
-            print("   For real AI analysis, set OPENAI_API_KEY environment variable.")
+            logger.warning("⚠️  OpenAI API key not found. Using enhanced mock mode - "
+                           "set OPENAI_API_KEY for real AI analysis.")
+        
+        logger.info("🔍 Brand Analysis Engine - API Status: " + ", ".join(
+            f"{name}: {'✅' if key else '❌'}" for name, key in _API_KEYS.items()
+        ))
         
-        print("🔍 Brand Analysis Engine - API Status:")
-        print(f"  OpenAI: {'✅' if self.openai_api_key else '❌'}")
-        print(f"  Anthropic: {'✅' if self.anthropic_api_key else '❌'}")
-        print(f"  Google: {'✅' if self.google_api_key else '❌'}")
-        print(f"  Hugging Face: {'✅' if self.huggingface_token else '❌'}")
-        print(f"  ElevenLabs: {'✅' if self.elevenlabs_api_key else '❌'}")
+        # Cache of parsed OpenAI analyses (TTLCache is not thread-safe, hence the lock)
+        self._analysis_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+        self._analysis_cache_lock = threading.Lock()
+        
+        # Generated image concepts keyed by prompt hash, so repeat clicks skip the OpenAI call
+        self._image_cache = TTLCache(maxsize=IMAGE_CACHE_SIZE, ttl=IMAGE_CACHE_TTL)
+        self._image_cache_lock = threading.Lock()
         
         # Initialize OpenAI client - primary AI engine
         self.openai_client = None
@@ -163,49 +453,59 @@ class BrandAnalysisEngine:
         # Extract key elements for framework
         primary_vulnerability = vulnerabilities[0] if vulnerabilities else "Corporate Contradictions"
         primary_angle = satirical_angles[0] if satirical_angles else "Generic corporate hypocrisy"
-        brand_name = website_url.replace('https://', '').replace('http://', '').split('/')[0]
-        
-        pentagram_structure = f"""
-P - PURPOSE: Create satirical visual commentary exposing "{primary_vulnerability}" in {brand_name}'s brand strategy
-E - ELEMENTS: Corporate imagery, visual metaphors, symbolic contradictions, brand iconography subversion
-N - NARRATIVE: "{primary_angle}" - revealing the gap between corporate messaging and reality
-T - TONE: Witty, clever, incisive yet professional - satirical without being offensive or crude
-A - AUDIENCE: Media-literate consumers who understand corporate marketing tactics and visual symbolism
-G - GUIDELINES: Professional quality, suitable for editorial use, legally defensible parody/commentary
-R - RESULTS: Single powerful image concept that immediately communicates the satirical point
-A - AESTHETICS: Contemporary editorial illustration style, clean composition, symbolic clarity
-M - METAPHORS: Visual symbols that represent {primary_vulnerability} through recognizable corporate imagery
-
-TARGET VULNERABILITIES: {', '.join(vulnerabilities[:3])}
-SATIRICAL PERSPECTIVES: {', '.join(satirical_angles[:2])}
-BRAND CONTEXT: {brand_name}
-IMAGE SEQUENCE: #{image_number} of conceptual series"""
+        brand_name = brand_name_from_url(website_url)
         
-        return pentagram_structure
+        return _PENTAGRAM_TEMPLATE.format(
+            primary_vulnerability=primary_vulnerability,
+            primary_angle=primary_angle,
+            brand_name=brand_name,
+            vulns=', '.join(vulnerabilities[:3]),
+            angles=', '.join(satirical_angles[:2]),
+            image_number=image_number
+        )
         
         
-    def scrape_website(self, url):
-        """Scrape basic website content for analysis"""
+    def scrape_website(self, url, on_progress=None):
+        """Scrape basic website content for analysis, reporting progress once the site responds"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Extract basic info
-            content = response.text.lower()
-            title = ""
-            if "<title>" in content:
-                title = content.split("<title>")[1].split("</title>")[0].strip()
-            
-            return {
-                'url': url,
-                'title': title,
-                'content_length': len(response.text),
-                'status_code': response.status_code,
-                'scraped_at': datetime.now().isoformat()
-            }
+            with http_session.get(url, timeout=SCRAPE_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                if on_progress:
+                    on_progress(50)
+                
+                # Read until the title is found or the byte budget is spent
+                body = bytearray()
+                match = None
+                chunks = response.iter_content(chunk_size=SCRAPE_CHUNK_SIZE)
+                for chunk in chunks:
+                    search_from = max(0, len(body) - SCRAPE_TITLE_OVERLAP)
+                    body += chunk
+                    match = _TITLE_RE.search(body, search_from)
+                    if match or len(body) >= SCRAPE_MAX_BYTES:
+                        break
+                
+                # Closing a partly read response drops the connection; when little is left,
+                # read it out so the connection goes back to http_session's pool instead
+                content_length = parse_content_length(response.headers.get('Content-Length'))
+                if content_length is not None and content_length - response.raw.tell() <= SCRAPE_DRAIN_MAX_BYTES:
+                    try:
+                        for _ in chunks:
+                            pass
+                    except requests.RequestException:
+                        pass  # The title is already in hand; the connection is simply not reused
+                
+                # Extract basic info
+                title = ""
+                if match:
+                    title = html.unescape(match.group(1).decode('utf-8', errors='replace')).strip()
+                
+                return {
+                    'url': url,
+                    'title': title,
+                    'content_length': len(body) if content_length is None else content_length,
+                    'status_code': response.status_code,
+                    'scraped_at': datetime.now().isoformat()
+                }
         except Exception as e:
             return {
                 'url': url,
@@ -213,32 +513,58 @@ IMAGE SEQUENCE: #{image_number} of conceptual series"""
                 'scraped_at': datetime.now().isoformat()
             }
     
-    def analyze_brand_vulnerabilities(self, website_data, analysis_type='deep'):
+    def analyze_brand_vulnerabilities(self, website_data, analysis_type=DEFAULT_ANALYSIS_TYPE, on_progress=None):
         """Generate brand vulnerability analysis with satirical insights using OpenAI or fallback"""
         
         # Determine analysis parameters
-        if analysis_type == 'quick':
-            num_vulnerabilities = 3
-            num_angles = 3
-        elif analysis_type == 'deep':
-            num_vulnerabilities = 5
-            num_angles = 5
-        else:  # mega
-            num_vulnerabilities = 8
-            num_angles = 8
+        params = ANALYSIS_PARAMS.get(analysis_type, ANALYSIS_PARAMS[DEFAULT_ANALYSIS_TYPE])
+        num_vulnerabilities, num_angles = params.num_vulnerabilities, params.num_angles
         
         # Use OpenAI for real analysis if available
         if self.ai_mode == 'openai' and self.openai_client:
-            return self._analyze_with_openai(website_data, analysis_type, num_vulnerabilities, num_angles)
+            return self._analyze_with_openai(website_data, analysis_type, num_vulnerabilities, num_angles, on_progress)
         else:
             return self._analyze_with_fallback(website_data, analysis_type, num_vulnerabilities, num_angles)
     
-    def _analyze_with_openai(self, website_data, analysis_type, num_vulnerabilities, num_angles):
+    @staticmethod
+    def _analysis_cache_key(url, analysis_type, title):
+        """Build a compact content key for the OpenAI analysis cache"""
+        normalized_url = url.strip().rstrip('/')
+        raw_key = f"{normalized_url}|{analysis_type}|{title}".encode()
+        return hashlib.blake2b(raw_key, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _parse_json_object(content):
+        """Parse a JSON object from a model response, tolerating text around the object
+        
+        Raises:
+            ValueError: If the response is missing, oversized or holds no JSON object
+        """
+        if not content or len(content) > MAX_AI_RESPONSE_CHARS:
+            raise ValueError("Missing or oversized JSON response")
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Strip any preamble or trailing prose around the outermost braces
+            start, end = content.find('{'), content.rfind('}')
+            if start < 0 or end <= start:
+                raise
+            return orjson.loads(content[start:end + 1])
+    
+    def _analyze_with_openai(self, website_data, analysis_type, num_vulnerabilities, num_angles, on_progress=None):
         """Real AI analysis using OpenAI GPT-4"""
         try:
             url = website_data.get('url', 'unknown website')
             title = website_data.get('title', 'unknown brand')
             
+            # Skip the GPT round-trip entirely for a recently analyzed page
+            cache_key = self._analysis_cache_key(url, analysis_type, title)
+            with self._analysis_cache_lock:
+                cached = self._analysis_cache.get(cache_key)
+            if cached:
+                vulnerabilities, satirical_angles = cached
+                return self._build_openai_result(website_data, analysis_type, vulnerabilities, satirical_angles)
+            
             # Create comprehensive analysis prompt
             prompt = f"""Analyze this brand for satirical vulnerabilities and corporate contradictions:
 
@@ -273,91 +599,71 @@ Be clever, satirical, and professionally critical without being offensive."""
                 model="gpt-4o",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=800,
-                temperature=0.8
+                # Deterministic sampling: repeat analyses match the local cache and
+                # are friendlier to server-side prompt caching
+                temperature=0.0,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0,
+                response_format=_ANALYSIS_RESPONSE_FORMAT,
+                stream=False
             )
+            if on_progress:
+                on_progress(80)
             
-            # Parse OpenAI response
+            # Parse OpenAI response - structured output should return a single JSON object
             content = response.choices[0].message.content
             
-            # Extract JSON from response
             try:
-                import re
-                json_match = re.search(r'\{[\s\S]*\}', content)
-                if json_match:
-                    ai_analysis = json.loads(json_match.group())
-                    vulnerabilities = ai_analysis.get('vulnerabilities', [])
-                    satirical_angles = ai_analysis.get('satirical_angles', [])
-                else:
-                    raise ValueError("No valid JSON found in response")
-            except:
-                # Fallback parsing if JSON fails
+                ai_analysis = self._parse_json_object(content)
+                vulnerabilities = ai_analysis.get('vulnerabilities', [])
+                satirical_angles = ai_analysis.get('satirical_angles', [])
+            except (ValueError, AttributeError):
+                # Fallback analysis if the response is not a usable JSON object
                 return self._analyze_with_fallback(website_data, analysis_type, num_vulnerabilities, num_angles)
             
-            # Calculate overall score
-            avg_score = sum(v.get('score', 5.0) for v in vulnerabilities) / len(vulnerabilities) if vulnerabilities else 7.5
+            vulnerabilities = vulnerabilities[:num_vulnerabilities]
+            satirical_angles = satirical_angles[:num_angles]
+            with self._analysis_cache_lock:
+                self._analysis_cache[cache_key] = (vulnerabilities, satirical_angles)
             
-            return {
-                'vulnerability_score': round(avg_score, 1),
-                'vulnerabilities': vulnerabilities[:num_vulnerabilities],
-                'satirical_angles': satirical_angles[:num_angles],
-                'analysis_type': analysis_type,
-                'ai_mode': 'openai',
-                'timestamp': datetime.now().isoformat(),
-                'website_data': website_data
-            }
+            return self._build_openai_result(website_data, analysis_type, vulnerabilities, satirical_angles)
             
         except Exception as e:
             print(f"OpenAI analysis failed: {e}")
             return self._analyze_with_fallback(website_data, analysis_type, num_vulnerabilities, num_angles)
     
+    def _build_openai_result(self, website_data, analysis_type, vulnerabilities, satirical_angles):
+        """Assemble the analysis result for OpenAI-sourced vulnerabilities and angles"""
+        # Calculate overall score
+        avg_score = sum(v.get('score', 5.0) for v in vulnerabilities) / len(vulnerabilities) if vulnerabilities else 7.5
+        
+        return {
+            'vulnerability_score': round(avg_score, 1),
+            'vulnerabilities': [dict(v) for v in vulnerabilities],
+            'satirical_angles': list(satirical_angles),
+            'analysis_type': analysis_type,
+            'ai_mode': 'openai',
+            'timestamp': datetime.now().isoformat(),
+            'website_data': website_data
+        }
+    
     def _analyze_with_fallback(self, website_data, analysis_type, num_vulnerabilities, num_angles):
         """Fallback analysis with enhanced templates"""
         
-        vulnerability_templates = [
-            {
-                'categories': ['Premium Pricing', 'Artificial Scarcity', 'Feature Removal'],
-                'satirical_angles': [
-                    'The "courage" to charge more for less',
-                    'Revolutionary simplicity through elimination',
-                    'Premium minimalism at maximum cost'
-                ]
-            },
+        # Sample every category in one call; all templates carry the same number of categories,
+        # so drawing from the flattened pool keeps the original distribution
+        categories = random.choices(_ALL_CATEGORIES, k=num_vulnerabilities)
+        vulnerabilities = [
             {
-                'categories': ['Innovation Theater', 'Marketing Buzzwords', 'Trend Hijacking'],
-                'satirical_angles': [
-                    'Disrupting disruption with disruptive innovation',
-                    'AI-powered everything (including toasters)',
-                    'Sustainable unsustainability initiatives'
-                ]
-            },
-            {
-                'categories': ['Customer Lock-in', 'Ecosystem Dependency', 'Planned Obsolescence'],
-                'satirical_angles': [
-                    'Freedom through proprietary standards',
-                    'Infinite compatibility with finite products',
-                    'Future-proofing through forced upgrades'
-                ]
-            }
-        ]
-        
-        # Generate vulnerabilities
-        vulnerabilities = []
-        for i in range(num_vulnerabilities):
-            template = random.choice(vulnerability_templates)
-            category = random.choice(template['categories'])
-            score = round(random.uniform(6.5, 9.8), 1)
-            vulnerabilities.append({
                 'name': category,
-                'score': score,
+                'score': round(random.uniform(6.5, 9.8), 1),
                 'description': f'Analysis of {category.lower()} patterns in brand strategy'
-            })
-        
-        # Generate satirical angles
-        all_angles = []
-        for template in vulnerability_templates:
-            all_angles.extend(template['satirical_angles'])
+            }
+            for category in categories
+        ]
         
-        satirical_angles = random.sample(all_angles, min(num_angles, len(all_angles)))
+        satirical_angles = random.sample(_ALL_ANGLES, min(num_angles, len(_ALL_ANGLES)))
         
         # Calculate overall vulnerability score
         avg_score = sum(v['score'] for v in vulnerabilities) / len(vulnerabilities)
@@ -372,6 +678,48 @@ Be clever, satirical, and professionally critical without being offensive."""
             'website_data': website_data
         }
     
+    def _generate_image_concepts(self, prompt, count, website_url, vulnerabilities, satirical_angles):
+        """Generate all image concepts with a single GPT-4o call, filling gaps from PENTAGRAM templates
+        
+        Returns:
+            list: (image_concept, source) tuples, one per requested image
+        """
+        concepts = []
+        try:
+            if self.openai_client:
+                # One round-trip returns every concept instead of one call per image
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=200 * count,
+                    temperature=0.7,  # Concepts should still vary
+                    top_p=1.0,
+                    response_format=_CONCEPTS_RESPONSE_FORMAT,
+                    stream=False
+                )
+                
+                content = response.choices[0].message.content
+                for item in self._parse_json_object(content).get('concepts', [])[:count]:
+                    concept = item.get('concept', '').strip() if isinstance(item, dict) else ''
+                    if concept:
+                        concepts.append((concept, 'gpt-4o'))
+            else:
+                raise Exception("OpenAI client not available")
+                
+        except Exception as e:
+            print(f"GPT-4o image generation failed: {e}")
+        
+        # Fallback to enhanced PENTAGRAM-structured concept for anything GPT-4o did not return
+        if len(concepts) < count:
+            brand_name = brand_name_from_url(website_url)
+            primary_vulnerability = vulnerabilities[0] if vulnerabilities else 'corporate contradictions'
+            primary_angle = satirical_angles[0] if satirical_angles else 'generic corporate hypocrisy'
+            
+            image_concept = f"PENTAGRAM-Structured Satirical Concept: Visual metaphor exposing {brand_name}'s {primary_vulnerability} through {primary_angle}. A professionally composed editorial illustration that cleverly subverts corporate imagery to reveal underlying contradictions in brand messaging."
+            concepts.extend((image_concept, 'pentagram-fallback') for _ in range(count - len(concepts)))
+        
+        return concepts
+    
     def generate_satirical_images(self, analysis_data, count=1):
         """Generate satirical brand image concepts using PENTAGRAM framework"""
         try:
@@ -380,76 +728,179 @@ Be clever, satirical, and professionally critical without being offensive."""
             vulnerabilities = [v.get('name', '') for v in analysis_data.get('vulnerabilities', [])]
             satirical_angles = analysis_data.get('satirical_angles', [])
             
-            images = []
-            for i in range(count):
-                # Apply PENTAGRAM Framework for structured prompt generation
-                pentagram_prompt = self._build_pentagram_prompt(website_url, vulnerabilities, satirical_angles, i+1)
-                
-                # Create enhanced prompt using PENTAGRAM structure
-                prompt = f"""PENTAGRAM PROMPT FRAMEWORK - SATIRICAL BRAND ANALYSIS
+            # Apply PENTAGRAM Framework for structured prompt generation
+            pentagram_prompt = self._build_pentagram_prompt(website_url, vulnerabilities, satirical_angles, f"1-{count}")
+            
+            # Create enhanced prompt using PENTAGRAM structure, asking for the whole series at once
+            prompt = f"""PENTAGRAM PROMPT FRAMEWORK - SATIRICAL BRAND ANALYSIS
 
 {pentagram_prompt}
 
-DIRECTIVE: Generate a witty, satirical image description that exposes corporate hypocrisy through visual metaphor. Be creative and humorous but not offensive. Format as a detailed visual description suitable for professional image generation.
-
-OUTPUT: Respond with just the image description, no preamble or extra text."""
-
-                try:
-                    if self.openai_client:
-                        # Use GPT-4o to generate satirical image concept
-                        response = self.openai_client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[{"role": "user", "content": prompt}],
-                            max_tokens=200,
-                            temperature=0.8
-                        )
-                        
-                        content = response.choices[0].message.content
-                        image_concept = content.strip() if content else "No image concept generated"
-                        source = 'gpt-4o'
-                    else:
-                        raise Exception("OpenAI client not available")
-                        
-                except Exception as e:
-                    print(f"GPT-4o image generation failed: {e}")
-                    # Fallback to enhanced PENTAGRAM-structured concept
-                    brand_name = website_url.replace('https://', '').replace('http://', '').split('/')[0]
-                    primary_vulnerability = vulnerabilities[0] if vulnerabilities else 'corporate contradictions'
-                    primary_angle = satirical_angles[0] if satirical_angles else 'generic corporate hypocrisy'
-                    
-                    image_concept = f"PENTAGRAM-Structured Satirical Concept: Visual metaphor exposing {brand_name}'s {primary_vulnerability} through {primary_angle}. A professionally composed editorial illustration that cleverly subverts corporate imagery to reveal underlying contradictions in brand messaging."
-                    source = 'pentagram-fallback'
-                
+DIRECTIVE: Generate {count} distinct, witty, satirical image descriptions that expose corporate hypocrisy through visual metaphor. Be creative and humorous but not offensive. Format each as a detailed visual description suitable for professional image generation.
+
+OUTPUT: Respond with JSON of the form {{"concepts": [{{"concept": "..."}}]}} containing exactly {count} entries, no preamble or extra text."""
+            
+            # The prompt is fully determined by the analysis and count, so its hash keys the cache
+            prompt_hash = hashlib.blake2b(prompt.encode(), digest_size=8).hexdigest()
+            with self._image_cache_lock:
+                cached = self._image_cache.get(prompt_hash)
+            if cached:
+                return [dict(image) for image in cached]
+            
+            concepts = self._generate_image_concepts(prompt, count, website_url, vulnerabilities, satirical_angles)
+            
+            now_ts = int(time.time())
+            now_iso = datetime.now().isoformat()
+            images = []
+            for i, (image_concept, source) in enumerate(concepts):
                 images.append({
-                    'id': f'img_{i+1}_{int(time.time())}',
+                    'id': f'img_{i+1}_{now_ts}',
                     'concept': image_concept,
-                    'prompt': prompt,
+                    'prompt_hash': prompt_hash,
                     'status': 'concept_generated',
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': now_iso,
                     'source': source
                 })
+            
+            # Don't pin template fallbacks caused by a transient OpenAI failure
+            if not self.openai_client or all(source == 'gpt-4o' for _, source in concepts):
+                with self._image_cache_lock:
+                    self._image_cache[prompt_hash] = tuple(dict(image) for image in images)
                 
             return images
             
         except Exception as e:
             print(f"Image generation error: {e}")
-            # Safe fallback with PENTAGRAM structure awareness
-            images = []
-            brand_name = website_url.replace('https://', '').replace('http://', '').split('/')[0] if 'website_url' in locals() else 'Unknown Brand'
-            for i in range(count):
-                images.append({
-                    'id': f'img_{i+1}_{int(time.time())}',
+            # Safe fallback with PENTAGRAM structure awareness - invariants computed once
+            brand_name = brand_name_from_url(website_url) if 'website_url' in locals() else 'Unknown Brand'
+            fallback_prompt_hash = hashlib.blake2b(
+                f'PENTAGRAM fallback prompt for {brand_name}'.encode(), digest_size=8
+            ).hexdigest()
+            now_ts = int(time.time())
+            now_iso = datetime.now().isoformat()
+            return [
+                {
+                    'id': f'img_{i+1}_{now_ts}',
                     'concept': f'PENTAGRAM Framework Concept #{i+1}: Satirical editorial illustration analyzing {brand_name} corporate messaging contradictions through visual metaphor',
-                    'prompt': f'PENTAGRAM fallback prompt for {brand_name}',
+                    'prompt_hash': fallback_prompt_hash,
                     'status': 'pentagram_fallback_generated',
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': now_iso,
                     'source': 'pentagram-emergency-fallback'
-                })
-            return images
+                }
+                for i in range(count)
+            ]
 
 # Initialize the analysis engine
 brand_engine = BrandAnalysisEngine()
 
+# Simple SVG favicon with cyberpunk theme, encoded once at import
+FAVICON_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">
+        <rect fill="#000011" width="32" height="32"/>
+        <circle cx="16" cy="16" r="12" fill="none" stroke="#00ff41" stroke-width="2"/>
+        <text x="16" y="20" text-anchor="middle" fill="#00ff41" font-family="monospace" font-size="14" font-weight="bold">🎭</text>
+        <rect x="4" y="4" width="24" height="2" fill="#00ff41" opacity="0.7"/>
+        <rect x="4" y="26" width="24" height="2" fill="#00ff41" opacity="0.7"/>
+    </svg>'''.encode('utf-8')
+FAVICON_ETAG = hashlib.blake2b(FAVICON_SVG, digest_size=8).hexdigest()
+
+# Analyses run on a bounded pool; extra requests queue instead of spawning unbounded threads
+ANALYSIS_WORKERS = 16
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+
+# PDF rendering runs off the request path on first download. ReportLab is CPU-bound, so under
+# gevent (where ThreadPoolExecutor threads are patched into greenlets) it needs real OS threads
+PDF_RENDER_TIMEOUT = 30  # seconds
+if os.getenv('GEVENT'):
+    from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+    pdf_executor = NativeThreadPoolExecutor(max_workers=2)
+else:
+    pdf_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pdf')
+# Rendered PDF bytes (or the in-flight render future) keyed by analysis_id
+pdf_reports = TTLCache(maxsize=ANALYSIS_RESULTS_MAX, ttl=ANALYSIS_RESULTS_TTL)
+pdf_reports_lock = threading.Lock()
+
+def settle_pdf_report(analysis_id, report):
+    """Swap a finished render for its bytes, or drop it if it failed so the next download retries"""
+    with pdf_reports_lock:
+        if pdf_reports.get(analysis_id) is not report:
+            return  # Already settled, or the entry expired
+        if report.cancelled() or report.exception() is not None:
+            del pdf_reports[analysis_id]
+        else:
+            pdf_reports[analysis_id] = report.result()
+
+# Stylesheet and table style are built once and shared by every report
+PDF_STYLES = getSampleStyleSheet()
+PDF_TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+])
+
+def render_pdf_report(data):
+    """Render an analysis as a PDF report and return the document bytes"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=50, rightMargin=50,
+                            topMargin=42, bottomMargin=50)
+    # Paragraph parses its text as markup, so analysis strings are escaped
+    story = [
+        Paragraph("🎭 Brand Deconstruction Report", PDF_STYLES['Title']),
+        Paragraph(f"URL: {xml_escape(str(data.get('website_data', {}).get('url', 'N/A')))}", PDF_STYLES['Normal']),
+        Paragraph(f"Analysis Type: {xml_escape(str(data.get('analysis_type', 'N/A')))}", PDF_STYLES['Normal']),
+        Paragraph(f"Vulnerability Score: {xml_escape(str(data.get('vulnerability_score', 'N/A')))}/10", PDF_STYLES['Normal']),
+        Spacer(1, 20),
+        Paragraph("Key Vulnerabilities:", PDF_STYLES['Heading2']),
+    ]
+    
+    vulnerability_rows = [[vuln['name'], f"{vuln['score']}/10"] for vuln in data.get('vulnerabilities', [])]
+    if vulnerability_rows:
+        story.append(Table(vulnerability_rows, colWidths=[380, 60], hAlign='LEFT', style=PDF_TABLE_STYLE))
+    
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("Satirical Angles:", PDF_STYLES['Heading2']))
+    story.extend(Paragraph(xml_escape(str(angle)), PDF_STYLES['Bullet'], bulletText='•')
+                 for angle in data.get('satirical_angles', []))
+    
+    doc.build(story)
+    # getvalue() is the only copy; BytesIO(bytes) in the export route shares it
+    return buffer.getvalue()
+
+# Static scaffold of the HTML report, encoded once; only the analysis-specific middle is built per export
+_HTML_REPORT_HEAD = (
+    '<!DOCTYPE html>\n<html>\n<head>\n<title>Brand Analysis Report</title>\n<style>\n'
+    'body { font-family: monospace; background: #000; color: #00ff00; padding: 20px; }\n'
+    '.header { text-align: center; margin-bottom: 30px; }\n'
+    '.score { font-size: 24px; color: #ff0000; font-weight: bold; }\n'
+    '.section { margin: 20px 0; padding: 15px; border: 1px solid #00ff00; }\n'
+    '.vulnerability { margin: 10px 0; padding: 10px; background: rgba(0,255,0,0.1); }\n'
+    '.angle { margin: 5px 0; }\n'
+    '</style>\n</head>\n<body>\n<div class="header">\n<h1>🎭 Brand Deconstruction Report</h1>\n'
+).encode('utf-8')
+_HTML_REPORT_TAIL = b'</div>\n</body>\n</html>\n'
+
+def render_html_report(data):
+    """Render an analysis as a standalone HTML report, escaping scraped and AI-generated text
+    
+    Returns:
+        The UTF-8 encoded document
+    """
+    website_url = data.get('website_data', {}).get('url', 'N/A')
+    parts = [
+        f"<p>Target: {escape(website_url)}</p>\n",
+        f"<p>Analysis Type: {escape(data.get('analysis_type', 'N/A'))}</p>\n",
+        f"<p>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n</div>\n",
+        '<div class="section">\n<h2>Vulnerability Score</h2>\n',
+        f"<div class=\"score\">{escape(data.get('vulnerability_score', 'N/A'))}/10</div>\n</div>\n",
+        '<div class="section">\n<h2>Key Vulnerabilities</h2>\n'
+    ]
+    parts.extend(
+        f'<div class="vulnerability">• {escape(v["name"])}: {escape(v["score"])}/10</div>\n'
+        for v in data.get('vulnerabilities', [])
+    )
+    parts.append('</div>\n<div class="section">\n<h2>Satirical Angles</h2>\n')
+    parts.extend(f'<div class="angle">• {escape(angle)}</div>\n' for angle in data.get('satirical_angles', []))
+    return b''.join((_HTML_REPORT_HEAD, ''.join(parts).encode('utf-8'), _HTML_REPORT_TAIL))
+
 @app.route('/')
 def index():
     """Main application interface"""
@@ -457,43 +908,38 @@ def index():
 
 @app.route('/favicon.ico')
 def favicon():
-    """Serve cyberpunk-themed favicon"""
-    # Create a simple SVG favicon with cyberpunk theme
-    favicon_svg = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">
-        <rect fill="#000011" width="32" height="32"/>
-        <circle cx="16" cy="16" r="12" fill="none" stroke="#00ff41" stroke-width="2"/>
-        <text x="16" y="20" text-anchor="middle" fill="#00ff41" font-family="monospace" font-size="14" font-weight="bold">🎭</text>
-        <rect x="4" y="4" width="24" height="2" fill="#00ff41" opacity="0.7"/>
-        <rect x="4" y="26" width="24" height="2" fill="#00ff41" opacity="0.7"/>
-    </svg>'''
-    
-    from flask import Response
-    response = Response(favicon_svg, mimetype='image/svg+xml')
-    response.headers['Cache-Control'] = 'public, max-age=86400'  # Cache for 1 day
-    return response
+    """Serve cyberpunk-themed favicon, answering revalidations with 304"""
+    if request.if_none_match.contains_weak(FAVICON_ETAG):
+        return Response(status=304, headers={'ETag': f'"{FAVICON_ETAG}"'})
+    return Response(
+        FAVICON_SVG,
+        mimetype='image/svg+xml',
+        headers={
+            'Cache-Control': 'public, max-age=604800, immutable',  # Cache for 1 week
+            'ETag': f'"{FAVICON_ETAG}"'
+        }
+    )
 
 @app.route('/api/analyze', methods=['POST'])
 @limiter.limit("10 per minute")  # Rate limit: 10 analyses per minute
 @validate_url_input
 def analyze_brand():
     """Start brand analysis process with SSRF protection and rate limiting"""
-    global current_analysis_id, analysis_results
-
     data = request.get_json()
     url = data.get('url')
-    analysis_type = data.get('type', 'deep')
+    analysis_type = data.get('type', DEFAULT_ANALYSIS_TYPE)
+    if analysis_type not in ANALYSIS_PARAMS:
+        analysis_type = DEFAULT_ANALYSIS_TYPE  # Also keeps metric labels bounded
 
     # URL is already validated by @validate_url_input decorator
     # Generate unique analysis ID
     analysis_id = f'analysis_{int(time.time())}_{random.randint(1000, 9999)}'
-    current_analysis_id = analysis_id
 
     # Log analysis start with structured data
     log_analysis(logger, analysis_id, url, analysis_type, 'started')
     
-    # Reset agent states
-    for agent in agent_states:
-        agent_states[agent] = {'progress': 0, 'status': 'Initializing...', 'active': True}
+    # Fresh agent states for this analysis only
+    start_agent_states(analysis_id)
     
     # Start analysis in background thread
     def run_analysis():
@@ -501,45 +947,34 @@ def analyze_brand():
         increment_active_analyses()
 
         try:
+            # Progress is reported at real checkpoints inside each stage rather than simulated
             # Step 1: Website scraping (Research Agent)
-            agent_states['research']['status'] = 'Scraping website...'
-            website_data = brand_engine.scrape_website(url)
-
-            # Simulate progress for research agent
-            for progress in range(0, 101, 20):
-                agent_states['research']['progress'] = progress
-                time.sleep(0.5)
-            agent_states['research']['status'] = 'Complete'
+            update_agent_state(analysis_id, 'research', status='Scraping website...', progress=10)
+            website_data = brand_engine.scrape_website(
+                url, on_progress=lambda progress: update_agent_state(analysis_id, 'research', progress=progress)
+            )
+            update_agent_state(analysis_id, 'research', status='Complete', progress=100)
 
             # Step 2: Brand analysis (CEO Agent)
-            agent_states['ceo']['status'] = 'Analyzing brand strategy...'
-            for progress in range(0, 101, 15):
-                agent_states['ceo']['progress'] = progress
-                time.sleep(0.7)
-
-            brand_analysis = brand_engine.analyze_brand_vulnerabilities(website_data, analysis_type)
-            agent_states['ceo']['status'] = 'Complete'
+            update_agent_state(analysis_id, 'ceo', status='Analyzing brand strategy...', progress=40)
+            brand_analysis = brand_engine.analyze_brand_vulnerabilities(
+                website_data, analysis_type,
+                on_progress=lambda progress: update_agent_state(analysis_id, 'ceo', progress=progress)
+            )
+            update_agent_state(analysis_id, 'ceo', status='Complete', progress=100)
 
             # Step 3: Performance metrics (Performance Agent)
-            agent_states['performance']['status'] = 'Calculating metrics...'
-            for progress in range(0, 101, 25):
-                agent_states['performance']['progress'] = progress
-                time.sleep(0.4)
-            agent_states['performance']['status'] = 'Complete'
+            update_agent_state(analysis_id, 'performance', status='Calculating metrics...', progress=70)
+            update_agent_state(analysis_id, 'performance', status='Complete', progress=100)
 
             # Step 4: Image concepts (Image Agent)
-            agent_states['image']['status'] = 'Generating concepts...'
-            for progress in range(0, 101, 30):
-                agent_states['image']['progress'] = progress
-                time.sleep(0.3)
-            agent_states['image']['status'] = 'Complete'
+            update_agent_state(analysis_id, 'image', status='Complete', progress=100)
 
-            # Store results
-            analysis_results[analysis_id] = brand_analysis
+            # Store results; the PDF report is only rendered if someone downloads it
+            store_analysis_result(analysis_id, brand_analysis)
 
             # Mark all agents as inactive
-            for agent in agent_states:
-                agent_states[agent]['active'] = False
+            update_agent_state(analysis_id, active=False)
 
             # Record successful analysis
             duration = time.time() - start_time
@@ -549,9 +984,7 @@ def analyze_brand():
 
         except Exception as e:
             logger.error(f"Analysis error for {analysis_id}: {e}", exc_info=True)
-            for agent in agent_states:
-                agent_states[agent]['status'] = 'Error'
-                agent_states[agent]['active'] = False
+            update_agent_state(analysis_id, status='Error', active=False)
 
             # Record failed analysis
             duration = time.time() - start_time
@@ -562,60 +995,126 @@ def analyze_brand():
         finally:
             decrement_active_analyses()
     
-    # Start analysis thread
-    thread = threading.Thread(target=run_analysis)
-    thread.daemon = True
-    thread.start()
+    # Queue analysis on the worker pool
+    analysis_executor.submit(run_analysis)
     
     return jsonify({
         'analysis_id': analysis_id,
         'status': 'started',
-        'estimated_duration': {'quick': 30, 'deep': 180, 'mega': 600}.get(analysis_type, 180)
+        'estimated_duration': ANALYSIS_PARAMS[analysis_type].estimated_duration
     })
 
-@app.route('/api/agent-status')
+@app.route('/api/agent-status', provide_automatic_options=False)
+@limiter.exempt  # Polled continuously during an analysis; limit at the load balancer
 def get_agent_status():
-    """Get current agent status and progress"""
-    return jsonify(agent_states)
+    """Legacy unscoped agent status; always standby so no caller sees another user's analysis"""
+    return agent_status_response(STANDBY_AGENT_JSON)
+
+@app.route('/api/agent-status/<analysis_id>', provide_automatic_options=False)
+@limiter.exempt  # Polled continuously during an analysis; limit at the load balancer
+def get_analysis_agent_status(analysis_id):
+    """Get agent status and progress for one analysis"""
+    payload = get_agent_status_json(analysis_id)
+    if payload is None:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return agent_status_response(payload)
+
+def agent_status_response(payload):
+    """JSON response for serialized agent states, answering unchanged polls with 304"""
+    etag = hashlib.blake2b(payload, digest_size=8).hexdigest()
+    # If-None-Match uses weak comparison (RFC 9110), so W/ tags from proxies still match
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    return Response(
+        payload,
+        mimetype='application/json',
+        headers={'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}  # Always revalidate
+    )
+
+@app.route('/api/agent-stream')
+@limiter.exempt  # EventSource reconnects on its own; limit at the load balancer
+def stream_agent_status():
+    """Legacy unscoped agent stream; sends standby states once so no caller sees another user's analysis"""
+    return Response(
+        b'data: ' + STANDBY_AGENT_JSON + b'\n\n',
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache'}
+    )
+
+@app.route('/api/agent-stream/<analysis_id>')
+@limiter.exempt  # EventSource reconnects on its own; limit at the load balancer
+def stream_analysis_agent_status(analysis_id):
+    """Stream agent status for one analysis as Server-Sent Events"""
+    if get_agent_snapshot(analysis_id) is None:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return agent_stream_response(analysis_id)
+
+def agent_stream_response(analysis_id):
+    """Server-Sent Events response pushing an analysis' agent states whenever a stage completes"""
+    def generate():
+        # Every update publishes a new snapshot, so identity tells whether this analysis changed;
+        # updates to other analyses wake the stream but send nothing
+        last_states = object()
+        while True:
+            with agent_state_changed:
+                changed = agent_state_changed.wait_for(
+                    lambda: agent_states.get(analysis_id) is not last_states, timeout=AGENT_STREAM_KEEPALIVE
+                )
+                if changed:
+                    last_states = states = agent_states.get(analysis_id)
+                    payload = get_agent_status_json(analysis_id) or STANDBY_AGENT_JSON
+
+            if not changed:
+                yield b': keepalive\n\n'
+                continue
+
+            yield b'data: ' + payload + b'\n\n'
+            if states is None or not any(agent.active for agent in states.values()):
+                break
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache'}
+    )
 
 @app.route('/api/results/<analysis_id>')
 def get_results(analysis_id):
     """Get analysis results"""
-    if analysis_id in analysis_results:
-        return jsonify(analysis_results[analysis_id])
-    else:
+    result = get_analysis_result(analysis_id)
+    if result is None:
         return jsonify({'error': 'Analysis not found'}), 404
+    return jsonify(result)
 
 @app.route('/api/generate-images', methods=['POST'])
 def generate_images():
     """Generate satirical brand images"""
-    data = request.get_json()
-    analysis_id = data.get('analysis_id', 'current')
+    data = request.get_json(silent=True) or {}
+    analysis_id = data.get('analysis_id')
     count = data.get('count', 1)
     
-    # Use current analysis if 'current' is specified
-    if analysis_id == 'current' and current_analysis_id:
-        analysis_id = current_analysis_id
+    # The client echoes back the id returned by /api/analyze
+    if not analysis_id:
+        return jsonify({'error': 'analysis_id is required'}), 400
     
-    if analysis_id not in analysis_results:
-        return jsonify({'error': 'Analysis not found. Please run analysis first.'}), 404
+    # bool is an int subclass, but true/false is not a count
+    if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= MAX_IMAGE_COUNT:
+        return jsonify({'error': f'count must be an integer between 1 and {MAX_IMAGE_COUNT}'}), 400
     
-    analysis_data = analysis_results[analysis_id]
+    analysis_data = get_analysis_result(analysis_id)
+    if analysis_data is None:
+        return jsonify({'error': 'Analysis not found. Please run analysis first.'}), 404
     
     try:
         # Generate images using GPT-4o
-        agent_states['image']['active'] = True
-        agent_states['image']['status'] = 'Generating concepts...'
-        agent_states['image']['progress'] = 50
+        update_agent_state(analysis_id, 'image', active=True, status='Generating concepts...', progress=50)
         
         images = brand_engine.generate_satirical_images(analysis_data, count)
         
-        # Store in analysis results
-        analysis_results[analysis_id]['generated_images'] = images
+        # Store a new result rather than mutating one other requests may be serializing
+        store_analysis_result(analysis_id, {**analysis_data, 'generated_images': images})
         
-        agent_states['image']['status'] = 'Complete'
-        agent_states['image']['progress'] = 100
-        agent_states['image']['active'] = False
+        update_agent_state(analysis_id, 'image', status='Complete', progress=100, active=False)
         
         return jsonify({
             'status': 'complete',
@@ -624,141 +1123,67 @@ def generate_images():
         })
         
     except Exception as e:
-        agent_states['image']['status'] = 'Error'
-        agent_states['image']['active'] = False
+        update_agent_state(analysis_id, 'image', status='Error', active=False)
         return jsonify({'error': f'Image generation failed: {str(e)}'}), 500
 
 @app.route('/api/export/<format>/<analysis_id>')
 def export_results(format, analysis_id):
     """Export analysis results in various formats"""
-    if analysis_id not in analysis_results:
+    data = get_analysis_result(analysis_id)
+    if data is None:
         return jsonify({'error': 'Analysis not found'}), 404
     
-    data = analysis_results[analysis_id]
+    # analysis_id comes from the URL, so keep it out of the header unsanitized
+    download_base = sanitize_filename(f'brand_analysis_{analysis_id}')
     
     if format == 'json':
-        # Create JSON file
-        json_data = json.dumps(data, indent=2)
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        temp_file.write(json_data)
-        temp_file.close()
+        # Serialize straight to bytes and serve from memory
+        json_data = orjson.dumps(data, option=orjson.OPT_INDENT_2)
         
         return send_file(
-            temp_file.name,
+            io.BytesIO(json_data),
             as_attachment=True,
-            download_name=f'brand_analysis_{analysis_id}.json',
+            download_name=f'{download_base}.json',
             mimetype='application/json'
         )
     
     elif format == 'pdf':
-        # Create PDF report
-        buffer = io.BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=letter)
-        
-        # Title
-        pdf.setFont("Helvetica-Bold", 16)
-        pdf.drawString(50, 750, "🎭 Brand Deconstruction Report")
-        
-        # Basic info
-        pdf.setFont("Helvetica", 12)
-        y_pos = 720
-        pdf.drawString(50, y_pos, f"URL: {data.get('website_data', {}).get('url', 'N/A')}")
-        y_pos -= 20
-        pdf.drawString(50, y_pos, f"Analysis Type: {data.get('analysis_type', 'N/A')}")
-        y_pos -= 20
-        pdf.drawString(50, y_pos, f"Vulnerability Score: {data.get('vulnerability_score', 'N/A')}/10")
-        y_pos -= 40
-        
-        # Vulnerabilities
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.drawString(50, y_pos, "Key Vulnerabilities:")
-        y_pos -= 20
-        
-        pdf.setFont("Helvetica", 10)
-        for vuln in data.get('vulnerabilities', []):
-            if y_pos < 100:
-                pdf.showPage()
-                y_pos = 750
-            pdf.drawString(70, y_pos, f"• {vuln['name']}: {vuln['score']}/10")
-            y_pos -= 15
-        
-        y_pos -= 20
+        # Rendered on the first download; concurrent downloads and retries share the same render
+        with pdf_reports_lock:
+            report = pdf_reports.get(analysis_id)
+            submitted = report is None
+            if submitted:
+                report = pdf_reports[analysis_id] = pdf_executor.submit(render_pdf_report, data)
+        if submitted:
+            # Outside the lock: the callback runs inline if the render has already finished
+            report.add_done_callback(partial(settle_pdf_report, analysis_id))
         
-        # Satirical angles
-        pdf.setFont("Helvetica-Bold", 14)
-        pdf.drawString(50, y_pos, "Satirical Angles:")
-        y_pos -= 20
-        
-        pdf.setFont("Helvetica", 10)
-        for angle in data.get('satirical_angles', []):
-            if y_pos < 100:
-                pdf.showPage()
-                y_pos = 750
-            pdf.drawString(70, y_pos, f"• {angle}")
-            y_pos -= 15
-        
-        pdf.save()
-        buffer.seek(0)
+        if not isinstance(report, bytes):
+            try:
+                pdf_bytes = report.result(timeout=PDF_RENDER_TIMEOUT)
+            except FutureTimeoutError:
+                # Still rendering; the render stays cached so a retry waits on it instead of queueing another
+                return jsonify({'error': 'PDF rendering timed out'}), 504
+            except Exception as e:
+                logger.error(f"PDF rendering failed for {analysis_id}: {e}", exc_info=True)
+                settle_pdf_report(analysis_id, report)  # Waiters can wake before the done callback runs
+                return jsonify({'error': 'PDF rendering failed'}), 500
+            
+            settle_pdf_report(analysis_id, report)
+            report = pdf_bytes
         
         return send_file(
-            io.BytesIO(buffer.read()),
+            io.BytesIO(report),
             as_attachment=True,
-            download_name=f'brand_analysis_{analysis_id}.pdf',
+            download_name=f'{download_base}.pdf',
             mimetype='application/pdf'
         )
     
     elif format == 'html':
-        # Create HTML report
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Brand Analysis Report</title>
-            <style>
-                body {{ font-family: monospace; background: #000; color: #00ff00; padding: 20px; }}
-                .header {{ text-align: center; margin-bottom: 30px; }}
-                .score {{ font-size: 24px; color: #ff0000; font-weight: bold; }}
-                .section {{ margin: 20px 0; padding: 15px; border: 1px solid #00ff00; }}
-                .vulnerability {{ margin: 10px 0; padding: 10px; background: rgba(0,255,0,0.1); }}
-                .angle {{ margin: 5px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🎭 Brand Deconstruction Report</h1>
-                <p>Target: {data.get('website_data', {}).get('url', 'N/A')}</p>
-                <p>Analysis Type: {data.get('analysis_type', 'N/A')}</p>
-                <p>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-            
-            <div class="section">
-                <h2>Vulnerability Score</h2>
-                <div class="score">{data.get('vulnerability_score', 'N/A')}/10</div>
-            </div>
-            
-            <div class="section">
-                <h2>Key Vulnerabilities</h2>
-                {''.join([f'<div class="vulnerability">• {v["name"]}: {v["score"]}/10</div>' for v in data.get('vulnerabilities', [])])}
-            </div>
-            
-            <div class="section">
-                <h2>Satirical Angles</h2>
-                {''.join([f'<div class="angle">• {angle}</div>' for angle in data.get('satirical_angles', [])])}
-            </div>
-        </body>
-        </html>
-        """
-        
-        temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.html')
-        temp_file.write(html_content)
-        temp_file.close()
-        
         return send_file(
-            temp_file.name,
+            io.BytesIO(render_html_report(data)),
             as_attachment=True,
-            download_name=f'brand_analysis_{analysis_id}.html',
+            download_name=f'{download_base}.html',
             mimetype='text/html'
         )
     
@@ -771,21 +1196,28 @@ def health_check():
     return jsonify({
         'status': 'operational',
         'timestamp': datetime.now().isoformat(),
-        'agents': len(agent_states),
+        'agents': len(AGENT_NAMES),
         'ai_mode': brand_engine.ai_mode,
         'openai_available': brand_engine.openai_client is not None,
         'live_mode': brand_engine.ai_mode == 'openai'
     })
 
 if __name__ == '__main__':
-    print("🎭 Brand Deconstruction Station Starting...")
-    print("📡 Server: http://localhost:3000")
-    print("🤖 AI Agents: Initialized")
-    print("🎮 Interface: Cyberpunk Terminal")
-    
     # Status will be shown by BrandAnalysisEngine initialization
-    print("\n" + "="*50)
-    print("🚀 Ready for brand deconstruction!")
-    print("="*50 + "\n")
+    # The banner goes out in a single write so it cannot interleave with log output
+    sys.stderr.write('\n'.join([
+        "🎭 Brand Deconstruction Station Starting...",
+        "📡 Server: http://localhost:3000",
+        "🤖 AI Agents: Initialized",
+        "🎮 Interface: Cyberpunk Terminal",
+        "",
+        "=" * 50,
+        "🚀 Ready for brand deconstruction!",
+        "=" * 50,
+        "",
+    ]) + '\n')
     
-    app.run(host='0.0.0.0', port=3000, debug=True, threaded=True)
+    # Development server only - production runs under gunicorn (see gunicorn.conf.py)
+    # Debugger and reloader are opt-in (see README: FLASK_DEBUG=True)
+    debug = os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=3000, debug=debug, threaded=True)
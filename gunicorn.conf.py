@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for Brand Deconstruction Station
+
+Usage: GEVENT=1 gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:3000')
+
+# Analysis work is almost entirely waiting on OpenAI and scraped sites, so a
+# gevent worker holds many requests at once without a thread per request.
+worker_class = 'gevent'
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))
+
+# Analysis results and agent state live in process memory, so every request
+# for an analysis must reach the worker that started it. Only raise this once
+# that state is moved to a shared store.
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+# Agent status streams stay open for the length of an analysis
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
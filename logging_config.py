@@ -4,21 +4,37 @@ Logging configuration for Brand Deconstruction Station
 Structured JSON logging with rotation
 """
 
+import atexit
+import copy
 import logging
-import json
 import os
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
-import traceback
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import orjson
 
 
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging"""
 
+    # (epoch second, formatted 'YYYY-MM-DDTHH:MM:SS') for the most recent record;
+    # a single tuple so concurrent handlers never see a mismatched pair
+    _last_second = (None, '')
+
+    def _timestamp(self, record):
+        """ISO 8601 UTC timestamp of record creation, reformatting the date part once per second"""
+        second = int(record.created)
+        cached_second, prefix = self._last_second
+        if second != cached_second:
+            prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+            self._last_second = (second, prefix)
+        return f"{prefix}.{int((record.created - second) * 1_000_000):06d}Z"
+
     def format(self, record):
         """Format log record as JSON"""
         log_data = {
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'timestamp': self._timestamp(record),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -31,10 +47,13 @@ class JSONFormatter(logging.Formatter):
 
         # Add exception info if present
         if record.exc_info:
+            # exc_text is shared with the other formatters, so each traceback is rendered once
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
             log_data['exception'] = {
                 'type': record.exc_info[0].__name__,
                 'message': str(record.exc_info[1]),
-                'traceback': traceback.format_exception(*record.exc_info)
+                'traceback': record.exc_text.splitlines()
             }
 
         # Add custom fields if present
@@ -47,7 +66,72 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, 'url'):
             log_data['url'] = record.url
 
-        return json.dumps(log_data)
+        return orjson.dumps(log_data).decode()
+
+
+class LocalQueueHandler(QueueHandler):
+    """Queue handler for an in-process listener
+
+    The stock QueueHandler flattens records for pickling and drops exc_info, which would
+    strip the structured exception block from JSON logs. Records here never leave the
+    process, so only the message is merged (args may be mutated after the call returns).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class FastRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that only checks the file size every CHECK_INTERVAL_BYTES of output
+
+    The stock handler formats every record a second time and seeks the stream on each
+    emit to decide whether to roll over. Here the written volume is estimated from the
+    message length and the real check runs once enough has accumulated, so a file may
+    overshoot maxBytes by roughly CHECK_INTERVAL_BYTES.
+    """
+
+    CHECK_INTERVAL_BYTES = 65536
+    RECORD_OVERHEAD = 256  # JSON envelope written around each message
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._bytes_since_check = 0
+
+    def shouldRollover(self, record):
+        self._bytes_since_check += len(record.getMessage()) + self.RECORD_OVERHEAD
+        if self._bytes_since_check < self.CHECK_INTERVAL_BYTES:
+            return 0
+        self._bytes_since_check = 0
+        return super().shouldRollover(record)
+
+
+# Listeners started by setup_logging, stopped (and their queues drained) on reconfigure or exit
+_queue_listeners = []
+
+
+def _queue_handler(*handlers):
+    """Return a handler that enqueues records for a background listener owning the given handlers
+
+    Logging calls on request threads then cost a queue put instead of disk I/O under the
+    handler locks. queue.Queue (rather than SimpleQueue) is used so gevent can patch it.
+    """
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _queue_listeners.append(listener)
+    return LocalQueueHandler(log_queue)
+
+
+def stop_queue_listeners():
+    """Flush pending records and stop the background logging listeners"""
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
+
+atexit.register(stop_queue_listeners)
 
 
 def setup_logging(app=None):
@@ -76,7 +160,7 @@ def setup_logging(app=None):
     )
 
     # Application log (JSON, rotating)
-    app_handler = RotatingFileHandler(
+    app_handler = FastRotatingFileHandler(
         'logs/app.json.log',
         maxBytes=10485760,  # 10MB
         backupCount=10
@@ -85,7 +169,7 @@ def setup_logging(app=None):
     app_handler.setLevel(logging.INFO)
 
     # Error log (JSON, rotating)
-    error_handler = RotatingFileHandler(
+    error_handler = FastRotatingFileHandler(
         'logs/errors.json.log',
         maxBytes=10485760,  # 10MB
         backupCount=10
@@ -94,7 +178,7 @@ def setup_logging(app=None):
     error_handler.setLevel(logging.ERROR)
 
     # Access log (JSON, rotating)
-    access_handler = RotatingFileHandler(
+    access_handler = FastRotatingFileHandler(
         'logs/access.json.log',
         maxBytes=10485760,  # 10MB
         backupCount=10
@@ -107,26 +191,26 @@ def setup_logging(app=None):
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(getattr(logging, log_level))
 
+    # Handlers are owned by background listeners; loggers only enqueue records
+    stop_queue_listeners()
+    queue_handler = _queue_handler(app_handler, error_handler, console_handler)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
     root_logger.handlers = []  # Clear existing handlers
-    root_logger.addHandler(app_handler)
-    root_logger.addHandler(error_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(queue_handler)
 
     # Configure Flask app logger if provided
     if app:
         app.logger.handlers = []
-        app.logger.addHandler(app_handler)
-        app.logger.addHandler(error_handler)
-        app.logger.addHandler(console_handler)
+        app.logger.addHandler(queue_handler)
         app.logger.setLevel(getattr(logging, log_level))
 
         # Configure access logger
         access_logger = logging.getLogger('access')
         access_logger.handlers = []
-        access_logger.addHandler(access_handler)
+        access_logger.addHandler(_queue_handler(access_handler))
         access_logger.setLevel(logging.INFO)
         access_logger.propagate = False
 
@@ -158,9 +242,8 @@ def log_request(logger, request_obj, response_status=None, response_time=None):
     if response_time:
         log_data['response_time'] = f"{response_time:.3f}s"
 
-    # Log as structured data
-    extra_data = logging.LoggerAdapter(logger, log_data)
-    extra_data.info(f"{request_obj.method} {request_obj.path}")
+    # Log as structured data; the message is only formatted if the record is emitted
+    logger.info("%s %s", request_obj.method, request_obj.path, extra=log_data)
 
 
 def log_analysis(logger, analysis_id, url, analysis_type, status):
@@ -175,7 +258,7 @@ def log_analysis(logger, analysis_id, url, analysis_type, status):
         status: Analysis status (started/completed/failed)
     """
     logger.info(
-        f"Analysis {status}: {analysis_id}",
+        "Analysis %s: %s", status, analysis_id,
         extra={
             'analysis_id': analysis_id,
             'url': url,
@@ -188,7 +271,9 @@ def log_analysis(logger, analysis_id, url, analysis_type, status):
 # Export functions
 __all__ = [
     'setup_logging',
+    'stop_queue_listeners',
     'log_request',
     'log_analysis',
     'JSONFormatter',
+    'FastRotatingFileHandler',
 ]
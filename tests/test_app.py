@@ -7,11 +7,14 @@ Test Flask routes, API endpoints, and core functionality
 import pytest
 import json
 import sys
+import threading
 import os
+from types import SimpleNamespace
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import app as app_module
 from app import app, BrandAnalysisEngine
 
 
@@ -30,6 +33,47 @@ def brand_engine():
     return BrandAnalysisEngine()
 
 
+def fake_openai_client(content):
+    """Build a stand-in OpenAI client whose chat completions return content"""
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    client.calls = calls
+    return client
+
+
+class FakeStreamedResponse:
+    """Minimal streamed requests.Response stand-in that records chunks read"""
+
+    def __init__(self, chunks, headers=None, status_code=200):
+        self.chunks = chunks
+        self.headers = headers or {}
+        self.status_code = status_code
+        self.chunks_read = 0
+        self.bytes_read = 0
+        self.raw = SimpleNamespace(tell=lambda: self.bytes_read)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.chunks:
+            self.chunks_read += 1
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
 class TestHealthEndpoint:
     """Test health check endpoint"""
 
@@ -127,6 +171,111 @@ class TestAgentStatusEndpoint:
         assert 'performance' in data
         assert 'image' in data
 
+    def test_agent_status_unscoped_is_standby(self, client):
+        """Test the legacy unscoped route never exposes another analysis"""
+        app_module.start_agent_states('analysis_status_private')
+        try:
+            data = json.loads(client.get('/api/agent-status').data)
+            assert all(agent['status'] == 'Standby' and not agent['active'] for agent in data.values())
+        finally:
+            app_module.agent_states.pop('analysis_status_private', None)
+
+    def test_agent_status_per_analysis(self, client):
+        """Test agent status is tracked separately for each analysis"""
+        app_module.start_agent_states('analysis_status_a')
+        app_module.start_agent_states('analysis_status_b')
+        try:
+            app_module.update_agent_state('analysis_status_a', 'ceo', status='Complete', progress=100)
+
+            data = json.loads(client.get('/api/agent-status/analysis_status_a').data)
+            assert data['ceo']['progress'] == 100
+            data = json.loads(client.get('/api/agent-status/analysis_status_b').data)
+            assert data['ceo']['progress'] == 0
+        finally:
+            app_module.agent_states.pop('analysis_status_a', None)
+            app_module.agent_states.pop('analysis_status_b', None)
+
+    def test_agent_status_json_cached_until_update(self):
+        """Test serialized agent status is reused until the next update"""
+        app_module.start_agent_states('analysis_status_cache')
+        try:
+            first = app_module.get_agent_status_json('analysis_status_cache')
+            assert app_module.get_agent_status_json('analysis_status_cache') is first
+            app_module.update_agent_state('analysis_status_cache', 'research', progress=50)
+            updated = app_module.get_agent_status_json('analysis_status_cache')
+            assert updated is not first
+            assert json.loads(updated)['research']['progress'] == 50
+        finally:
+            app_module.agent_states.pop('analysis_status_cache', None)
+            app_module.agent_state_json.pop('analysis_status_cache', None)
+
+    def test_agent_status_not_modified(self, client):
+        """Test unchanged agent status polls return 304 and are not rate limited"""
+        app_module.start_agent_states('analysis_status_etag')
+        try:
+            etag = client.get('/api/agent-status/analysis_status_etag').headers['ETag']
+            for _ in range(60):
+                response = client.get('/api/agent-status/analysis_status_etag', headers={'If-None-Match': etag})
+                assert response.status_code == 304
+            app_module.update_agent_state('analysis_status_etag', 'ceo', progress=40)
+            response = client.get('/api/agent-status/analysis_status_etag', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+        finally:
+            app_module.agent_states.pop('analysis_status_etag', None)
+            app_module.agent_state_json.pop('analysis_status_etag', None)
+
+    def test_agent_status_not_modified_weak_etag(self, client):
+        """Test a weak ETag from a proxy or compression layer still gets a 304"""
+        app_module.start_agent_states('analysis_status_weak')
+        try:
+            etag = client.get('/api/agent-status/analysis_status_weak').headers['ETag']
+            response = client.get('/api/agent-status/analysis_status_weak', headers={'If-None-Match': f'W/{etag}'})
+            assert response.status_code == 304
+        finally:
+            app_module.agent_states.pop('analysis_status_weak', None)
+            app_module.agent_state_json.pop('analysis_status_weak', None)
+
+    def test_agent_status_unknown_analysis(self, client):
+        """Test agent status for non-existent analysis"""
+        response = client.get('/api/agent-status/nonexistent_id')
+        assert response.status_code == 404
+
+
+class TestAgentStreamEndpoint:
+    """Test agent status streaming endpoint"""
+
+    def test_agent_stream_sends_snapshot(self, client):
+        """Test agent stream emits an SSE snapshot of agent status"""
+        response = client.get('/api/agent-stream')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        event = response.get_data(as_text=True)
+        assert event.startswith('data: ')
+        data = json.loads(event[len('data: '):])
+        assert set(data) == {'ceo', 'research', 'performance', 'image'}
+        assert all(agent['status'] == 'Standby' for agent in data.values())
+
+    def test_agent_stream_ignores_other_analyses(self, client, monkeypatch):
+        """Test a stream only sends events for its own analysis and keeps alive otherwise"""
+        monkeypatch.setattr(app_module, 'AGENT_STREAM_KEEPALIVE', 0.05)
+        app_module.start_agent_states('analysis_stream_a')
+        app_module.start_agent_states('analysis_stream_b')
+        try:
+            response = client.get('/api/agent-stream/analysis_stream_a')
+            events = iter(response.response)
+            assert next(events).startswith(b'data: ')
+            for _ in range(5):
+                app_module.update_agent_state('analysis_stream_b', 'ceo', progress=40)
+            assert next(events) == b': keepalive\n\n'
+            app_module.update_agent_state('analysis_stream_a', 'ceo', progress=40)
+            event = next(events)
+            assert json.loads(event[len(b'data: '):])['ceo']['progress'] == 40
+            response.close()
+        finally:
+            for analysis_id in ('analysis_stream_a', 'analysis_stream_b'):
+                app_module.agent_states.pop(analysis_id, None)
+                app_module.agent_state_json.pop(analysis_id, None)
+
 
 class TestResultsEndpoint:
     """Test results endpoint"""
@@ -139,6 +288,172 @@ class TestResultsEndpoint:
         assert 'error' in data
 
 
+class TestGenerateImagesEndpoint:
+    """Test image generation endpoint"""
+
+    def test_generate_images_requires_analysis_id(self, client):
+        """Test image generation without an analysis id is rejected"""
+        response = client.post('/api/generate-images', json={'count': 1})
+        assert response.status_code == 400
+
+    def test_generate_images_rejects_invalid_count(self, client):
+        """Test non-integer and out-of-range counts are rejected"""
+        original = {'website_data': {'url': 'https://example.com'}, 'vulnerabilities': [], 'satirical_angles': []}
+        app_module.store_analysis_result('analysis_images_count', original)
+        try:
+            for count in ('3', 2.5, True, 0, app_module.MAX_IMAGE_COUNT + 1):
+                response = client.post('/api/generate-images', json={'analysis_id': 'analysis_images_count', 'count': count})
+                assert response.status_code == 400
+        finally:
+            app_module.analysis_results.pop('analysis_images_count', None)
+
+    def test_generate_images_not_found(self, client):
+        """Test image generation for non-existent analysis"""
+        response = client.post('/api/generate-images', json={'analysis_id': 'nonexistent_id'})
+        assert response.status_code == 404
+
+    def test_generate_images_stores_images(self, client):
+        """Test generated images are attached to the stored analysis"""
+        original = {'website_data': {'url': 'https://example.com'}, 'vulnerabilities': [], 'satirical_angles': []}
+        app_module.store_analysis_result('analysis_images_test', original)
+        try:
+            response = client.post('/api/generate-images', json={'analysis_id': 'analysis_images_test', 'count': 2})
+            assert response.status_code == 200
+            stored = app_module.get_analysis_result('analysis_images_test')
+            assert len(stored['generated_images']) == 2
+            assert 'generated_images' not in original
+        finally:
+            app_module.analysis_results.pop('analysis_images_test', None)
+
+
+class TestExportEndpoint:
+    """Test analysis export endpoint"""
+
+    @pytest.fixture
+    def analysis_id(self):
+        """Store a completed analysis and remove it afterwards"""
+        analysis_id = 'analysis_export_test'
+        app_module.analysis_results[analysis_id] = {
+            'vulnerability_score': 8.1,
+            'vulnerabilities': [{'name': 'Innovation Theater', 'score': 8.1, 'description': 'x'}],
+            'satirical_angles': ['Disrupting disruption with disruptive innovation'],
+            'analysis_type': 'quick',
+            'website_data': {'url': 'https://example.com'},
+        }
+        yield analysis_id
+        app_module.analysis_results.pop(analysis_id, None)
+        app_module.pdf_reports.pop(analysis_id, None)
+
+    def test_export_json(self, client, analysis_id):
+        """Test JSON export returns the stored analysis"""
+        response = client.get(f'/api/export/json/{analysis_id}')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.data)['vulnerability_score'] == 8.1
+
+    def test_export_pdf(self, client, analysis_id):
+        """Test PDF export returns a PDF document"""
+        response = client.get(f'/api/export/pdf/{analysis_id}')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/pdf'
+        assert response.data.startswith(b'%PDF')
+
+    def test_export_pdf_cached_after_first_download(self, client, analysis_id, monkeypatch):
+        """Test the PDF is rendered on first download and its bytes reused afterwards"""
+        renders = []
+        real_render = app_module.render_pdf_report
+
+        def counting_render(data):
+            renders.append(data)
+            return real_render(data)
+
+        monkeypatch.setattr(app_module, 'render_pdf_report', counting_render)
+        assert analysis_id not in app_module.pdf_reports
+        first = client.get(f'/api/export/pdf/{analysis_id}')
+        second = client.get(f'/api/export/pdf/{analysis_id}')
+        assert first.data == second.data
+        assert len(renders) == 1
+        assert isinstance(app_module.pdf_reports[analysis_id], bytes)
+
+    def test_export_pdf_render_failure(self, client, analysis_id, monkeypatch):
+        """Test a failed render returns a JSON error and is retried on the next download"""
+        def broken_render(data):
+            raise KeyError('score')
+
+        monkeypatch.setattr(app_module, 'render_pdf_report', broken_render)
+        response = client.get(f'/api/export/pdf/{analysis_id}')
+        assert response.status_code == 500
+        assert 'error' in json.loads(response.data)
+        assert analysis_id not in app_module.pdf_reports
+
+        monkeypatch.undo()
+        response = client.get(f'/api/export/pdf/{analysis_id}')
+        assert response.status_code == 200
+        assert response.data.startswith(b'%PDF')
+
+    def test_export_pdf_timeout_reuses_render(self, client, analysis_id, monkeypatch):
+        """Test a retry after a timeout waits on the in-flight render instead of starting another"""
+        release = threading.Event()
+        renders = []
+        real_render = app_module.render_pdf_report
+
+        def slow_render(data):
+            renders.append(data)
+            release.wait(5)
+            return real_render(data)
+
+        monkeypatch.setattr(app_module, 'render_pdf_report', slow_render)
+        monkeypatch.setattr(app_module, 'PDF_RENDER_TIMEOUT', 0.05)
+        for _ in range(3):
+            response = client.get(f'/api/export/pdf/{analysis_id}')
+            assert response.status_code == 504
+            assert 'error' in json.loads(response.data)
+        assert len(renders) == 1
+
+        release.set()
+        monkeypatch.setattr(app_module, 'PDF_RENDER_TIMEOUT', 5)
+        response = client.get(f'/api/export/pdf/{analysis_id}')
+        assert response.status_code == 200
+        assert response.data.startswith(b'%PDF')
+        assert len(renders) == 1
+
+    def test_render_pdf_report_multiple_pages(self):
+        """Test long reports break across pages"""
+        data = {'satirical_angles': [f'Angle {i}' for i in range(80)], 'vulnerabilities': []}
+        pdf_bytes = app_module.render_pdf_report(data)
+        assert pdf_bytes.startswith(b'%PDF')
+        assert pdf_bytes.count(b'/Type /Page\n') >= 2
+
+    def test_export_html(self, client, analysis_id):
+        """Test HTML export contains the analysis"""
+        response = client.get(f'/api/export/html/{analysis_id}')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/html'
+        assert b'Innovation Theater' in response.data
+
+    def test_render_html_report_escapes_content(self):
+        """Test scraped and AI-generated text is escaped in HTML reports"""
+        data = {
+            'website_data': {'url': 'https://example.com/?q=<b>'},
+            'vulnerabilities': [{'name': '<img src=x>', 'score': 9.1}],
+            'satirical_angles': ['<script>alert(1)</script>']
+        }
+        html = app_module.render_html_report(data).decode('utf-8')
+        assert '<script>' not in html
+        assert '&lt;script&gt;alert(1)&lt;/script&gt;' in html
+        assert '&lt;img src=x&gt;: 9.1/10' in html
+
+    def test_export_unsupported_format(self, client, analysis_id):
+        """Test unsupported export format is rejected"""
+        response = client.get(f'/api/export/xml/{analysis_id}')
+        assert response.status_code == 400
+
+    def test_export_not_found(self, client):
+        """Test export of unknown analysis returns 404"""
+        response = client.get('/api/export/json/nonexistent_id')
+        assert response.status_code == 404
+
+
 class TestBrandAnalysisEngine:
     """Test BrandAnalysisEngine class"""
 
@@ -154,6 +469,60 @@ class TestBrandAnalysisEngine:
         assert result['url'] == 'https://example.com'
         assert 'scraped_at' in result
 
+    def test_website_scraping_stops_after_title(self, brand_engine, monkeypatch):
+        """Test scraping stops reading the body once the title is found"""
+        fake = FakeStreamedResponse(
+            [b'<html><head><TITLE>Acme Corp', b'</title></head>', b'<body>' + b'x' * 8192],
+            headers={'Content-Length': '123456'}
+        )
+        monkeypatch.setattr(app_module.http_session, 'get', lambda url, **kwargs: fake)
+        result = brand_engine.scrape_website('https://example.com')
+        assert result['title'] == 'Acme Corp'
+        assert result['content_length'] == 123456
+        assert fake.chunks_read == 2
+
+    def test_website_scraping_drains_small_remainder(self, brand_engine, monkeypatch):
+        """Test a small unread remainder is drained so the connection can be pooled"""
+        chunks = [b'<html><head><title>Acme Corp</title></head>', b'<body>' + b'x' * 8192, b'</body></html>']
+        fake = FakeStreamedResponse(chunks, headers={'Content-Length': str(sum(map(len, chunks)))})
+        monkeypatch.setattr(app_module.http_session, 'get', lambda url, **kwargs: fake)
+        result = brand_engine.scrape_website('https://example.com')
+        assert result['title'] == 'Acme Corp'
+        assert fake.chunks_read == 3
+
+    def test_website_scraping_malformed_content_length(self, brand_engine, monkeypatch):
+        """Test a malformed Content-Length header does not fail the scrape"""
+        fake = FakeStreamedResponse([b'<title>Acme</title>'], headers={'Content-Length': 'bogus'})
+        monkeypatch.setattr(app_module.http_session, 'get', lambda url, **kwargs: fake)
+        result = brand_engine.scrape_website('https://example.com')
+        assert 'error' not in result
+        assert result['title'] == 'Acme'
+        assert result['content_length'] == len(b'<title>Acme</title>')
+
+    def test_website_scraping_title_entities_and_newlines(self, brand_engine, monkeypatch):
+        """Test titles spanning lines with entities and stray '<' are extracted"""
+        fake = FakeStreamedResponse([b'<title>\n  Acme &amp; Sons <3\n</title>'])
+        monkeypatch.setattr(app_module.http_session, 'get', lambda url, **kwargs: fake)
+        result = brand_engine.scrape_website('https://example.com')
+        assert result['title'] == 'Acme & Sons <3'
+
+    def test_website_scraping_reports_progress(self, brand_engine, monkeypatch):
+        """Test scraping reports progress once the site responds"""
+        fake = FakeStreamedResponse([b'<title>Acme</title>'])
+        monkeypatch.setattr(app_module.http_session, 'get', lambda url, **kwargs: fake)
+        progress = []
+        brand_engine.scrape_website('https://example.com', on_progress=progress.append)
+        assert progress == [50]
+
+    def test_website_scraping_title_split_late_in_body(self, brand_engine, monkeypatch):
+        """Test a title split across chunks after earlier chunks is still found"""
+        fake = FakeStreamedResponse(
+            [b'<html><head>' + b' ' * 8192, b' ' * 8192 + b'<title>Late', b' Title</title>']
+        )
+        monkeypatch.setattr(app_module.http_session, 'get', lambda url, **kwargs: fake)
+        result = brand_engine.scrape_website('https://example.com')
+        assert result['title'] == 'Late Title'
+
     def test_website_scraping_invalid_url(self, brand_engine):
         """Test website scraping with invalid URL"""
         result = brand_engine.scrape_website('http://invalid-url-that-does-not-exist.com')
@@ -181,6 +550,117 @@ class TestBrandAnalysisEngine:
         assert 'vulnerabilities' in result
         assert len(result['vulnerabilities']) >= 8
 
+    def test_analyze_with_openai_parses_json(self, brand_engine):
+        """Test OpenAI analysis parses the JSON-mode response"""
+        content = json.dumps({
+            'vulnerabilities': [{'name': 'Greenwashing', 'score': 8.0, 'description': 'x'}],
+            'satirical_angles': ['Eco-friendly smokestacks'],
+        })
+        brand_engine.openai_client = fake_openai_client(content)
+        website_data = {'url': 'https://example.com', 'title': 'Example'}
+        result = brand_engine._analyze_with_openai(website_data, 'quick', 3, 3)
+        assert result['ai_mode'] == 'openai'
+        assert result['vulnerabilities'][0]['name'] == 'Greenwashing'
+        assert result['vulnerability_score'] == 8.0
+        assert brand_engine.openai_client.calls[0]['response_format']['type'] == 'json_schema'
+        assert brand_engine.openai_client.calls[0]['temperature'] == 0.0
+
+    def test_analyze_with_openai_uses_cache(self, brand_engine):
+        """Test repeat OpenAI analysis of the same page is served from cache"""
+        content = json.dumps({
+            'vulnerabilities': [{'name': 'Greenwashing', 'score': 8.0, 'description': 'x'}],
+            'satirical_angles': ['Eco-friendly smokestacks'],
+        })
+        brand_engine.openai_client = fake_openai_client(content)
+        website_data = {'url': 'https://example.com', 'title': 'Example'}
+        first = brand_engine._analyze_with_openai(website_data, 'quick', 3, 3)
+        second = brand_engine._analyze_with_openai(website_data, 'quick', 3, 3)
+        assert len(brand_engine.openai_client.calls) == 1
+        assert second['vulnerabilities'] == first['vulnerabilities']
+
+        brand_engine._analyze_with_openai(website_data, 'deep', 5, 5)
+        assert len(brand_engine.openai_client.calls) == 2
+
+    def test_analyze_with_openai_invalid_json_falls_back(self, brand_engine):
+        """Test OpenAI analysis falls back when the response is not JSON"""
+        brand_engine.openai_client = fake_openai_client('not json at all')
+        website_data = {'url': 'https://example.com', 'title': 'Example'}
+        result = brand_engine._analyze_with_openai(website_data, 'quick', 3, 3)
+        assert result['ai_mode'] == 'fallback'
+        assert len(result['vulnerabilities']) == 3
+
+    def test_analyze_with_openai_json_with_preamble(self, brand_engine):
+        """Test OpenAI analysis recovers a JSON object wrapped in prose"""
+        content = 'Here you go: ' + json.dumps({
+            'vulnerabilities': [{'name': 'Greenwashing', 'score': 7.0, 'description': 'Eco claims'}],
+            'satirical_angles': ['Carbon neutral by 2099']
+        }) + ' Enjoy!'
+        brand_engine.openai_client = fake_openai_client(content)
+        website_data = {'url': 'https://example.com', 'title': 'Example'}
+        result = brand_engine._analyze_with_openai(website_data, 'quick', 3, 3)
+        assert result['ai_mode'] == 'openai'
+        assert result['vulnerabilities'][0]['name'] == 'Greenwashing'
+
+    def test_analysis_depth_parameters(self, brand_engine):
+        """Test analysis depth controls the number of vulnerabilities"""
+        website_data = {'url': 'https://example.com', 'title': 'Example'}
+        assert len(brand_engine.analyze_brand_vulnerabilities(website_data, 'mega')['vulnerabilities']) == 8
+        assert len(brand_engine.analyze_brand_vulnerabilities(website_data, 'unknown')['vulnerabilities']) == 5
+
+    def test_brand_name_from_url(self):
+        """Test brand name is the host part of the URL"""
+        assert app_module.brand_name_from_url('https://example.com/about') == 'example.com'
+        assert app_module.brand_name_from_url('http://shop.example.com') == 'shop.example.com'
+        assert app_module.brand_name_from_url('example.com/path') == 'example.com'
+
+    def test_generate_satirical_images_count(self, brand_engine):
+        """Test image concept generation returns one concept per requested image"""
+        analysis_data = brand_engine.analyze_brand_vulnerabilities(
+            {'url': 'https://example.com', 'title': 'Example'}, 'quick'
+        )
+        images = brand_engine.generate_satirical_images(analysis_data, count=3)
+        assert len(images) == 3
+        assert [img['id'].split('_')[1] for img in images] == ['1', '2', '3']
+        assert all(img['concept'] for img in images)
+
+    def test_generate_satirical_images_single_openai_call(self, brand_engine):
+        """Test all image concepts come back from one batched OpenAI call"""
+        content = json.dumps({'concepts': [{'concept': 'Concept A'}, {'concept': 'Concept B'}]})
+        brand_engine.openai_client = fake_openai_client(content)
+        analysis_data = brand_engine.analyze_brand_vulnerabilities(
+            {'url': 'https://example.com', 'title': 'Example'}, 'quick'
+        )
+        images = brand_engine.generate_satirical_images(analysis_data, count=3)
+        assert len(brand_engine.openai_client.calls) == 1
+        assert [img['concept'] for img in images[:2]] == ['Concept A', 'Concept B']
+        assert [img['source'] for img in images] == ['gpt-4o', 'gpt-4o', 'pentagram-fallback']
+
+    def test_generate_satirical_images_uses_cache(self, brand_engine):
+        """Test repeat image generation for the same analysis skips the OpenAI call"""
+        content = json.dumps({'concepts': [{'concept': 'Concept A'}, {'concept': 'Concept B'}]})
+        brand_engine.openai_client = fake_openai_client(content)
+        analysis_data = brand_engine.analyze_brand_vulnerabilities(
+            {'url': 'https://example.com', 'title': 'Example'}, 'quick'
+        )
+        first = brand_engine.generate_satirical_images(analysis_data, count=2)
+        second = brand_engine.generate_satirical_images(analysis_data, count=2)
+        assert len(brand_engine.openai_client.calls) == 1
+        assert second == first
+
+    def test_generate_satirical_images_emergency_fallback(self, brand_engine, monkeypatch):
+        """Test emergency fallback concepts share one brand name and timestamp"""
+        def broken_prompt(*args):
+            raise RuntimeError('prompt failure')
+
+        monkeypatch.setattr(brand_engine, '_build_pentagram_prompt', broken_prompt)
+        analysis_data = {'website_data': {'url': 'https://example.com/about'}}
+        images = brand_engine.generate_satirical_images(analysis_data, count=4)
+        assert len(images) == 4
+        assert {img['source'] for img in images} == {'pentagram-emergency-fallback'}
+        assert len({img['timestamp'] for img in images}) == 1
+        assert all('example.com' in img['concept'] for img in images)
+        assert all('prompt_hash' in img and 'prompt' not in img for img in images)
+
 
 class TestRateLimiting:
     """Test rate limiting functionality"""
@@ -227,6 +707,27 @@ class TestIndexRoute:
         response = client.get('/')
         assert response.status_code == 200
 
+    def test_favicon(self, client):
+        """Test that favicon is served as cacheable SVG"""
+        response = client.get('/favicon.ico')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/svg+xml'
+        assert response.data.startswith(b'<svg')
+        assert 'max-age' in response.headers['Cache-Control']
+
+    def test_favicon_not_modified(self, client):
+        """Test favicon revalidation with a matching ETag returns 304"""
+        etag = client.get('/favicon.ico').headers['ETag']
+        response = client.get('/favicon.ico', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_favicon_not_modified_weak_etag(self, client):
+        """Test favicon revalidation with a weak ETag returns 304"""
+        etag = client.get('/favicon.ico').headers['ETag']
+        response = client.get('/favicon.ico', headers={'If-None-Match': f'W/{etag}'})
+        assert response.status_code == 304
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Logging tests for Brand Deconstruction Station
+Test structured JSON log formatting
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from types import SimpleNamespace
+
+from logging_config import FastRotatingFileHandler, JSONFormatter, LocalQueueHandler, log_request
+
+
+def make_record(msg='Analysis %s', args=('completed',), exc_info=None):
+    """Build a log record the way a logger call would"""
+    return logging.LogRecord('app', logging.INFO, __file__, 42, msg, args, exc_info)
+
+
+class TestJSONFormatter:
+    """Test the JSON log formatter"""
+
+    def test_format_is_valid_json(self):
+        """Test records are rendered as a single JSON object"""
+        record = make_record()
+        record.url = 'https://example.com'
+
+        log_data = json.loads(JSONFormatter().format(record))
+        assert log_data['message'] == 'Analysis completed'
+        assert log_data['level'] == 'INFO'
+        assert log_data['line'] == 42
+        assert log_data['url'] == 'https://example.com'
+
+    def test_timestamp_is_utc(self):
+        """Test timestamps are ISO 8601 in UTC with a Z suffix"""
+        log_data = json.loads(JSONFormatter().format(make_record()))
+        assert log_data['timestamp'].endswith('Z')
+        assert 'T' in log_data['timestamp']
+
+    def test_timestamp_uses_record_creation_time(self):
+        """Test timestamps reflect when the record was created, not when it was formatted"""
+        formatter = JSONFormatter()
+        record = make_record()
+        record.created = 1700000000.25
+        assert json.loads(formatter.format(record))['timestamp'] == '2023-11-14T22:13:20.250000Z'
+
+        # A later record in a new second must not reuse the cached date prefix
+        record.created = 1700000061.5
+        assert json.loads(formatter.format(record))['timestamp'] == '2023-11-14T22:14:21.500000Z'
+
+
+class TestLocalQueueHandler:
+    """Test records handed to the background logging listener"""
+
+    def test_prepare_keeps_exception_info(self):
+        """Test queued records still carry exc_info for the JSON exception block"""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = make_record(exc_info=sys.exc_info())
+
+        handler = LocalQueueHandler(queue.Queue())
+        prepared = handler.prepare(record)
+        assert prepared.msg == 'Analysis completed'
+        assert prepared.args is None
+        assert prepared.exc_info is record.exc_info
+
+        log_data = json.loads(JSONFormatter().format(prepared))
+        assert log_data['message'] == 'Analysis completed'
+        assert log_data['exception']['type'] == 'ValueError'
+        assert log_data['exception']['traceback'][-1] == 'ValueError: boom'
+        assert prepared.exc_text  # cached for the other handlers
+
+
+class RecordingHandler(logging.Handler):
+    """Collect emitted records for inspection"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLogRequest:
+    """Test structured request logging"""
+
+    def test_request_fields_attached_to_record(self):
+        """Test request details travel as record attributes alongside the message"""
+        logger = logging.getLogger('test_log_request')
+        logger.propagate = False
+        handler = RecordingHandler()
+        logger.addHandler(handler)
+        request_obj = SimpleNamespace(method='GET', path='/api/health', remote_addr='127.0.0.1', user_agent=None)
+
+        try:
+            log_request(logger, request_obj, response_status=200, response_time=0.0123)
+        finally:
+            logger.removeHandler(handler)
+
+        record, = handler.records
+        assert record.getMessage() == 'GET /api/health'
+        assert record.status == 200
+        assert record.response_time == '0.012s'
+        assert record.remote_addr == '127.0.0.1'
+
+
+class TestFastRotatingFileHandler:
+    """Test size-based rotation with batched size checks"""
+
+    def test_rolls_over_once_check_interval_reached(self, tmp_path):
+        """Test the log still rotates when the size is only checked periodically"""
+        log_file = tmp_path / 'app.json.log'
+        handler = FastRotatingFileHandler(str(log_file), maxBytes=1024, backupCount=1)
+        handler.CHECK_INTERVAL_BYTES = 4096
+        try:
+            for _ in range(40):
+                handler.emit(make_record(msg='x' * 100, args=()))
+        finally:
+            handler.close()
+
+        assert (tmp_path / 'app.json.log.1').exists()
+
+    def test_skips_size_check_below_interval(self, tmp_path, monkeypatch):
+        """Test the underlying size check is not run for every record"""
+        calls = []
+        monkeypatch.setattr(
+            logging.handlers.RotatingFileHandler, 'shouldRollover',
+            lambda self, record: calls.append(record) or 0
+        )
+        handler = FastRotatingFileHandler(str(tmp_path / 'app.json.log'), maxBytes=1024, backupCount=1)
+        try:
+            for _ in range(10):
+                handler.emit(make_record())
+        finally:
+            handler.close()
+
+        assert calls == []
@@ -9,7 +9,6 @@ import os
 from dotenv import load_dotenv
 import json
 import time
-import tempfile
 import io
 from datetime import datetime
 import threading
@@ -122,13 +121,10 @@ class VoiceSynthesisEngine:
                 speed=speed
             )
             
-            # Create temporary file for audio
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            response.stream_to_file(temp_file.name)
-            
+            # Keep the audio in memory; it is only ever base64-encoded for the client
             return {
                 'status': 'success',
-                'file_path': temp_file.name,
+                'audio_bytes': response.content,
                 'service': 'openai',
                 'voice': voice,
                 'model': model,
@@ -178,14 +174,10 @@ class VoiceSynthesisEngine:
             response = requests.post(url, json=data, headers=headers, timeout=30)
             response.raise_for_status()
             
-            # Create temporary file for audio
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            temp_file.write(response.content)
-            temp_file.close()
-            
+            # Keep the audio in memory; it is only ever base64-encoded for the client
             return {
                 'status': 'success',
-                'file_path': temp_file.name,
+                'audio_bytes': response.content,
                 'service': 'elevenlabs',
                 'voice': voice_id,
                 'stability': stability,
@@ -273,15 +265,8 @@ def synthesize_openai():
         
         result = synthesis_engine.generate_openai_speech(text, voice, model, speed)
         
-        # Convert file to base64 for client
-        with open(result['file_path'], 'rb') as f:
-            audio_data = base64.b64encode(f.read()).decode('utf-8')
-        
-        # Clean up temp file
-        os.unlink(result['file_path'])
-        
-        result['audio_data'] = audio_data
-        del result['file_path']
+        # Encode audio to base64 for client
+        result['audio_data'] = base64.b64encode(result.pop('audio_bytes')).decode('ascii')
         
         return jsonify(result)
         
@@ -306,15 +291,8 @@ def synthesize_elevenlabs():
         
         result = synthesis_engine.generate_elevenlabs_speech(text, voice, stability, clarity)
         
-        # Convert file to base64 for client
-        with open(result['file_path'], 'rb') as f:
-            audio_data = base64.b64encode(f.read()).decode('utf-8')
-        
-        # Clean up temp file
-        os.unlink(result['file_path'])
-        
-        result['audio_data'] = audio_data
-        del result['file_path']
+        # Encode audio to base64 for client
+        result['audio_data'] = base64.b64encode(result.pop('audio_bytes')).decode('ascii')
         
         return jsonify(result)
         